@@ -25,6 +25,13 @@ def build_binary():
         "--specpath", "./",             # Location for .spec file
         "--console",                    # Console application
         "--add-data", "requirements.txt:.", # Include requirements.txt
+        # The onefile binary is unpacked on every run, so keep it small
+        "--strip",                      # Strip symbols from bundled shared libraries
+        "--noupx",                      # UPX-compressed libraries are slower to load
+        "--exclude-module", "tkinter",  # Stdlib modules sstate never imports
+        "--exclude-module", "unittest",
+        "--exclude-module", "pydoc",
+        "--exclude-module", "test",
         script_name
     ]
     
@@ -1,14 +1,19 @@
 #!/bin/env python3
 
 import argparse
-import subprocess
+import os
 import re
-from tabulate import tabulate
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from itertools import chain
+from functools import lru_cache
 from colorama import Fore, Back, Style, init
 
-# Initialize colorama for cross-platform colored output
-init(autoreset=True)
-
 def parse_args():
     parser = argparse.ArgumentParser(
         description="Query node data in Slurm.",
@@ -27,18 +32,96 @@ def parse_args():
         type=str,
         metavar=""
     )
+    parser.add_argument(
+        "--cache-ttl",
+        help="Reuse Slurm output (scontrol or sinfo) from a previous run if it is younger than this many seconds (default: 5).",
+        type=float,
+        default=5,
+        metavar=""
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="Always query Slurm, without reading or writing the cache.",
+        action="store_true"
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--scontrol-json",
+        help="Read node data from 'scontrol show nodes --json' instead of parsing the --oneliner text (requires Slurm 21.08+).",
+        action="store_true"
+    )
+    source.add_argument(
+        "--sinfo",
+        help="Read node data from 'sinfo', which returns only the fields sstate shows, instead of 'scontrol show nodes'.",
+        action="store_true"
+    )
     args = parser.parse_args()
     return args
 
+# The scontrol fields sstate reads, and the " Key=" marker each is found by in a --oneliner line
+_NODE_FIELDS = ('NodeName', 'CPUAlloc', 'CPUTot', 'CPULoad', 'RealMemory', 'AllocMem', 'State', 'Partitions')
+_NODE_FIELD_MARKERS = tuple((field, f" {field}=") for field in _NODE_FIELDS)
+
+# sinfo --Format fields used by --sinfo: a width of 0 prints each value in full and "|" separates them
+_SINFO_FORMAT = "NodeList:0|,CPUsState:0|,CPUsLoad:0|,Memory:0|,AllocMem:0|,StateLong:0|,Partition:0"
+
+# Column headers for the node and cluster totals tables
+_NODE_HEADERS = ('Node', 'AllocCPU', 'AvailCPU', 'TotalCPU', 'CPU Usage', 'CPULoad', 'AllocMem', 'AvailMem', 'TotalMem', 'Mem Usage', 'NodeState')
+_TOTALS_HEADERS = ('Nodes', 'AllocCPU', 'AvailCPU', 'TotalCPU', 'CPU Usage', 'AvgLoad', 'AllocMem', 'AvailMem', 'TotalMem', 'Mem Usage')
+
+# One node's values, in _NODE_HEADERS order; format_node_row turns them into table cells
+NodeRow = namedtuple('NodeRow', ['node', 'cpu_alloc', 'cpu_avail', 'cpu_tot', 'cpu_usage', 'cpu_load', 'alloc_mem', 'avail_mem', 'total_mem', 'mem_usage', 'state'])
+
+# The cluster-wide values, in _TOTALS_HEADERS order; cpu_load is the average load per node
+ClusterTotals = namedtuple('ClusterTotals', ['nodes', 'cpu_alloc', 'cpu_avail', 'cpu_tot', 'cpu_usage', 'cpu_load', 'alloc_mem', 'avail_mem', 'total_mem', 'mem_usage'])
+
+# Cells are already formatted, so tabulate's number parsing is disabled and the counts/loads are right-aligned explicitly
+_NODE_COLALIGN = ('left', 'right', 'right', 'right', 'left', 'right', 'left', 'left', 'left', 'left', 'left')
+_TOTALS_COLALIGN = ('right', 'right', 'right', 'right', 'left', 'right', 'left', 'left', 'left', 'left')
+
+# Matches the color codes colorama writes, which take up no width on screen
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+
+# Binary unit prefixes, starting from the MB values scontrol reports
+_MEM_UNITS = ('Mi', 'Gi', 'Ti', 'Pi', 'Ei', 'Zi', 'Yi')
+
 # This function converts MB to larger units
+# Nodes of the same type share memory sizes, so results are cached (callers pass ints from parse_int)
+@lru_cache(maxsize=512)
 def human_readable(num, suffix='B'):
-    for unit in ['Mi','Gi','Ti','Pi','Ei','Zi']:
-        if abs(num) < 1024.0:
-            return "%3.1f%s%s" % (num, unit, suffix)
-        num /= 1024.0
-    return "%.1f%s%s" % (num, 'Yi', suffix)
+    # Every 10 bits of the value is another factor of 1024, so the unit comes straight from the bit length
+    unit_index = min((int(abs(num)).bit_length() - 1) // 10, len(_MEM_UNITS) - 1)
+    if unit_index <= 0:
+        return "%3.1f%s%s" % (num, 'Mi', suffix)
+    return "%3.1f%s%s" % (num / (1 << (10 * unit_index)), _MEM_UNITS[unit_index], suffix)
+
+# Resets color after a colored cell
+_RESET = Style.RESET_ALL
+
+# Node state colors as (substring of the lowercased state, ANSI prefix), checked in order so bad states come first
+_BAD_STATE_COLOR = Fore.RED + Style.BRIGHT
+_STATE_COLORS = (
+    ('down', _BAD_STATE_COLOR),
+    ('drain', _BAD_STATE_COLOR),
+    ('fail', _BAD_STATE_COLOR),
+    ('error', _BAD_STATE_COLOR),
+    ('alloc', Fore.GREEN),
+    ('mixed', Fore.YELLOW),
+)
+
+# Usage color bands: below 25%, 25-50%, 50-75% and 75% and up (0% is uncolored); these must match the legend
+_USAGE_THRESHOLDS = (25, 50, 75)
+_USAGE_COLORS = (Fore.YELLOW, Fore.BLUE, Fore.CYAN, Fore.GREEN + Style.BRIGHT)
+
+# Usage bars for 0-100%, one block per 10%
+_BARS = tuple("█" * i for i in range(11))
+
+# The 0% cell, which idle nodes and empty totals produce on every row; 0% is default (no color)
+_ZERO_PERCENTAGE = f"{_RESET}  0.0%{_RESET} {_RESET}{_RESET}"
 
 # This function adds color coding to node states
+# A cluster only has a handful of distinct state strings, so results are cached
+@lru_cache(maxsize=128)
 def colorize_node_state(state):
     """
     Add color coding to node states:
@@ -49,39 +132,19 @@ def colorize_node_state(state):
     Note: Any bad state takes precedence if combined (e.g., mixed+down -> bad).
     """
     state_lower = state.lower()
-    
-    # Bad states take precedence over others
-    if any(bad_state in state_lower for bad_state in ['down', 'drain', 'fail', 'error']):
-        return f"{Fore.RED}{Style.BRIGHT}{state}{Style.RESET_ALL}"
-    elif 'allocated' in state_lower or 'alloc' in state_lower:
-        return f"{Fore.GREEN}{state}{Style.RESET_ALL}"
-    elif 'mixed' in state_lower:
-        return f"{Fore.YELLOW}{state}{Style.RESET_ALL}"
-    elif 'idle' in state_lower:
-        return f"{state}"  # Default color
-    else:
-        # Default color for unknown states
-        return f"{state}"
+    for keyword, color in _STATE_COLORS:
+        if keyword in state_lower:
+            return color + state + _RESET
+    # Idle and unknown states keep the default color
+    return state
 
 def format_percentage(percentage):
     """Format percentage with visual bar indicator"""
     if percentage == 0:
-        color = Style.RESET_ALL  # 0% is default (no color)
-        bar_length = 0
-    elif percentage >= 75:
-        color = Fore.GREEN + Style.BRIGHT  # 75-100% is full (bright green)
-        bar_length = 10
-    elif percentage >= 50:
-        color = Fore.CYAN  # 50-75% is high (cyan)
-        bar_length = 8
-    elif percentage >= 25:
-        color = Fore.BLUE  # 25-50% is moderate (blue)
-        bar_length = 6
-    else:
-        color = Fore.YELLOW  # 1-25% is low (yellow)
-        bar_length = 4
-    bar = "█" * min(int(percentage / 10), 10)
-    return f"{color}{percentage:5.1f}%{Style.RESET_ALL} {color}{bar}{Style.RESET_ALL}"
+        return _ZERO_PERCENTAGE
+    color = _USAGE_COLORS[bisect_right(_USAGE_THRESHOLDS, percentage)]
+    bar = _BARS[min(int(percentage) // 10, 10)]
+    return f"{color}{percentage:5.1f}%{_RESET} {color}{bar}{_RESET}"
 
 def print_section_header(title):
     """Print a styled section header"""
@@ -96,206 +159,370 @@ def create_colored_headers(headers):
         colored_headers.append(f"{Fore.BLUE}{Style.BRIGHT}{header}{Style.RESET_ALL}")
     return colored_headers
 
-# This function will take the scontrol output and reformat the node data into a list of kv pairs
+# The colored headers never change, so both tables' headers are built once
+_NODE_COLORED_HEADERS = tuple(create_colored_headers(_NODE_HEADERS))
+_TOTALS_COLORED_HEADERS = tuple(create_colored_headers(_TOTALS_HEADERS))
+
+# This function prints rows as a tabulate "grid" table, padding every cell to the widest one in its column
+# Measuring the cells directly is much cheaper than tabulate's general-purpose width handling on large clusters
+# Text other than printable ASCII and the usage bars still goes through tabulate, which can measure wide characters
+def print_table(rows, headers, colalign):
+    cells = [headers]
+    cells.extend([str(cell).strip() for cell in row] for row in rows)
+    texts = [[_ANSI_RE.sub("", cell) if "\x1b" in cell else cell for cell in row] for row in cells]
+    plain_text = "".join(chain.from_iterable(texts)).replace("█", "")
+    if not rows or not (plain_text.isascii() and plain_text.isprintable()):
+        # Imported here because it is slow to load and most tables never need it
+        from tabulate import tabulate
+        print(tabulate(rows, headers=headers, tablefmt="grid", colalign=colalign, disable_numparse=True))
+        return
+
+    # tabulate leaves room for at least two spaces beside each header
+    widths = [max(len(header) + 2, max(map(len, column))) for header, column in zip(texts[0], zip(*texts[1:]))]
+    lines = []
+    for row, row_texts in zip(cells, texts):
+        padded = [
+            cell + " " * (width - len(text)) if align == "left" else " " * (width - len(text)) + cell
+            for cell, text, width, align in zip(row, row_texts, widths, colalign)
+        ]
+        lines.append("| " + " | ".join(padded) + " |")
+    rule = "+" + "+".join("-" * (width + 2) for width in widths) + "+"
+    header_rule = "+" + "+".join("=" * (width + 2) for width in widths) + "+"
+    print("\n".join((rule, lines[0], header_rule, ("\n" + rule + "\n").join(lines[1:]), rule)))
+
+# This function will take a line of scontrol output and reformat the node data into a dict of kv pairs
 # This will allow for better parsing/filtering of the node data later in the script
-def reformat_scontrol_output(scontrol_output, node_data_list=[]):
-    scontrol_output = scontrol_output.splitlines()
-    for node_output in scontrol_output:
-        temp_data_list = []
-        node = re.split(r"([A-Z]\w+=)", node_output)
-        for element, line in enumerate(node):
-            if re.match(r"([A-Z]\w+=)", line):
-                temp_data_list.append("{0}{1}".format(node[element], node[element+1]))
-        node_data_list.append(temp_data_list)
+# Only the fields in _NODE_FIELDS are extracted, each with a find and a slice instead of tokenizing the whole line
+def reformat_scontrol_line(node_output):
+    # Prefix a space so NodeName, the first field, is matched like every other " Key=" marker
+    node_output = " " + node_output.rstrip("\n")
+    node = {}
+    for key, marker in _NODE_FIELD_MARKERS:
+        # The first match wins, so free text later in the line (e.g. Reason=...) cannot override a field
+        start = node_output.find(marker)
+        if start == -1:
+            continue
+        start += len(marker)
+        end = node_output.find(" ", start)
+        node[key] = node_output[start:end] if end != -1 else node_output[start:]
+    return node
+
+# Environment variables that change which cluster the Slurm commands query or what they print
+_SLURM_ENV_VARS = ('SLURM_CONF', 'SLURM_CLUSTERS')
+_SLURM_ENV_PREFIXES = ('SCONTROL_', 'SINFO_')
+
+# This function returns where the output of a Slurm query is cached for the current user
+# Output queried under different Slurm settings (e.g. another SLURM_CONF) is cached under a different name
+def slurm_cache_path(cache_name):
+    slurm_env = sorted((key, value) for key, value in os.environ.items() if key in _SLURM_ENV_VARS or key.startswith(_SLURM_ENV_PREFIXES))
+    if slurm_env:
+        # Imported here because most runs have none of these variables set
+        import hashlib
+        cache_name += "-" + hashlib.sha256(repr(slurm_env).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"sstate-{os.getuid()}-{cache_name}.cache")
+
+# This function returns the cached output of a Slurm query, or None if there is no cache file
+# written by this user within the last cache_ttl seconds
+# The temp directory is shared, so the path is opened without blocking or following symlinks, and anything
+# other than a regular file (e.g. a FIFO planted by another user) is ignored before it is read
+def read_slurm_cache(cache_path, cache_ttl):
+    try:
+        fd = os.open(cache_path, os.O_RDONLY | os.O_NONBLOCK | getattr(os, "O_NOFOLLOW", 0))
+    except OSError:
+        return None
+    with os.fdopen(fd, "rb") as cache:
+        cache_stat = os.fstat(fd)
+        if not stat.S_ISREG(cache_stat.st_mode):
+            return None
+        if cache_stat.st_uid != os.getuid() or time.time() - cache_stat.st_mtime >= cache_ttl:
+            return None
+        return cache.read()
+
+# This function closes and removes a partially written cache file
+# Caching is best effort, so errors here are ignored rather than interrupting the output
+def discard_slurm_cache(cache):
+    try:
+        cache.close()
+    except OSError:
+        pass
+    try:
+        os.unlink(cache.name)
+    except OSError:
+        pass
+
+# This function yields the output of a Slurm command (scontrol/sinfo) line by line (as bytes) as it is written
+# With a cache_ttl, output cached under cache_name by a run less than cache_ttl seconds ago is replayed instead of
+# querying the Slurm controller again, and fresh output is copied into the cache as it streams past
+def iter_slurm_output(command, cache_name, cache_ttl=0):
+    cache_path = slurm_cache_path(cache_name)
+    cache = None
+    if cache_ttl > 0:
+        cached_output = read_slurm_cache(cache_path, cache_ttl)
+        if cached_output is not None:
+            yield from cached_output.splitlines(keepends=True)
+            return
+        # Caching is best effort; an unwritable or full temp directory just means this run isn't cached
+        try:
+            cache = tempfile.NamedTemporaryFile(dir=os.path.dirname(cache_path), prefix="sstate-", delete=False)
+        except OSError:
+            cache = None
+
+    try:
+        with subprocess.Popen(command, stdout=subprocess.PIPE) as proc:
+            for line in proc.stdout:
+                if cache:
+                    try:
+                        cache.write(line)
+                    except OSError:
+                        discard_slurm_cache(cache)
+                        cache = None
+                yield line
+        if proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+        # Publish the cache atomically once the command has succeeded
+        if cache:
+            try:
+                cache.close()
+                os.replace(cache.name, cache_path)
+                cache = None
+            except OSError:
+                pass
+    finally:
+        # Drop the partial cache if writing it failed, the command failed or the caller stopped reading early
+        if cache:
+            discard_slurm_cache(cache)
+
+# This function yields each node from scontrol as soon as its line is read, so reading,
+# filtering and parsing happen in a single pass without building intermediate lists
+def iter_scontrol_nodes(cache_ttl=0):
+    for node_output in iter_slurm_output(["scontrol", "show", "nodes", "--oneliner"], "show-nodes-oneliner", cache_ttl):
+        yield reformat_scontrol_line(node_output.decode("utf-8"))
+
+# Newer Slurm releases wrap numbers in the JSON output as {"set": ..., "infinite": ..., "number": ...}
+def unwrap_json_number(value):
+    if isinstance(value, dict):
+        return value.get("number", 0) if value.get("set", False) else 0
+    return value or 0
+
+# This function will take the scontrol JSON output and convert each node into the same dict of kv pairs
+# produced by reformat_scontrol_line, so the filtering and parsing below work unchanged
+def reformat_scontrol_json(scontrol_output):
+    # Imported here because only --scontrol-json needs it
+    import json
+    scontrol_json = json.loads(scontrol_output)
+    if not isinstance(scontrol_json, dict):
+        raise ValueError("expected a JSON object")
+    node_data_list = []
+    # Optional fields may be missing or null, so fall back to empty values either way
+    for node in scontrol_json.get("nodes") or []:
+        # State is a list of flags (e.g. ["IDLE", "DRAIN"]) on newer Slurm, a string plus state_flags on older
+        state = node.get("state") or ""
+        if not isinstance(state, list):
+            state = [state.upper()] + (node.get("state_flags") or [])
+
+        node_data_list.append({
+            "NodeName": node.get("name") or "",
+            "CPUAlloc": str(unwrap_json_number(node.get("alloc_cpus"))),
+            "CPUTot": str(unwrap_json_number(node.get("cpus"))),
+            # The JSON cpu_load is the load average multiplied by 100
+            "CPULoad": "{0:.2f}".format(unwrap_json_number(node.get("cpu_load")) / 100.0),
+            "RealMemory": str(unwrap_json_number(node.get("real_memory"))),
+            "AllocMem": str(unwrap_json_number(node.get("alloc_memory"))),
+            "State": "+".join(state),
+            "Partitions": ",".join(node.get("partitions") or []),
+        })
     return node_data_list
 
-# This function will filter out unwanted nodes if a partition is specified
-def filter_partition_node_data(args, node_data_list, partition_node_data_list=[]):
+# These functions convert scontrol values to numbers, falling back to 0 for values like N/A
+# Counts are never negative, so a digit check avoids raising and catching ValueError per field
+def parse_int(value):
+    return int(value) if value.isdecimal() else 0
+
+def parse_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return 0.0
+
+# This function will take the sinfo output and convert each node into the same dict of kv pairs produced by
+# reformat_scontrol_line; sinfo --Node prints a node once per partition, so those lines are merged
+# A line without the seven _SINFO_FORMAT fields raises ValueError rather than being dropped from the table
+def reformat_sinfo_output(sinfo_lines):
+    nodes = {}
+    for line in sinfo_lines:
+        line = line.decode("utf-8").rstrip("\n")
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) != 7:
+            raise ValueError(f"unexpected sinfo output: {line}")
+        node_name, cpus_state, cpu_load, real_memory, alloc_mem, state, partition = fields
+        # The default partition is marked with a trailing *
+        partition = partition.rstrip("*")
+
+        node = nodes.get(node_name)
+        if node is not None:
+            node["Partitions"] += "," + partition
+            continue
+
+        # CPUsState is allocated/idle/other/total
+        cpus = cpus_state.split("/")
+        nodes[node_name] = {
+            "NodeName": node_name,
+            "CPUAlloc": cpus[0],
+            "CPUTot": cpus[-1],
+            "CPULoad": cpu_load,
+            "RealMemory": real_memory,
+            "AllocMem": alloc_mem,
+            "State": state.upper(),
+            "Partitions": partition,
+        }
+    return list(nodes.values())
+
+# This function splits a node's comma-separated Partitions value into a set of lowercased partition names
+# Most nodes share one of a few partition lists, so results are cached
+@lru_cache(maxsize=256)
+def partition_names(partitions):
+    return frozenset(partition.strip().lower() for partition in partitions.split(","))
+
+# This function will filter out unwanted nodes if a partition is specified, yielding the nodes that match
+# target is the lowercased partition name and is matched case-insensitively; is_debug selects only nodes whose sole partition is debug
+def filter_partition_node_data(node_data_list, target, is_debug):
     for node in node_data_list:
-        for line in node:
-            if line.split("=")[0].strip() == "Partitions":
-                if args.partition == "debug":
-                    if line.split("=")[1].strip() != "debug":
-                        continue
-                    else:
-                        partition_node_data_list.append(node)
-                else:
-                    for partition in line.split("=")[1].split(","):
-                        if args.partition.lower() == partition.strip():
-                            partition_node_data_list.append(node)
-    return partition_node_data_list
+        partitions = node.get("Partitions", "")
+        if is_debug:
+            if partitions.strip() == "debug":
+                yield node
+        elif target in partition_names(partitions):
+            yield node
+
+# This function calculates the usage percents and available resources for a single node
+def calculate_node_usage(cpu_alloc, cpu_tot, alloc_mem, total_mem):
+    # Calculates percent used for cpu
+    percent_used_cpu = 0.0
+    if cpu_tot > 0:
+        percent_used_cpu = cpu_alloc / cpu_tot * 100.0
+
+    # Calculates available cpus
+    cpu_avail = cpu_tot
+    if cpu_alloc != 0:
+        cpu_avail = cpu_tot - cpu_alloc
+
+    # Calculates percent used for memory
+    percent_used_mem = 0.0
+    if total_mem > 0:
+        percent_used_mem = alloc_mem / total_mem * 100.0
+
+    # Calculates available memory
+    avail_mem = total_mem
+    if alloc_mem != 0:
+        avail_mem = total_mem - alloc_mem
+
+    # Adjust available resources based on full allocated resources
+    if cpu_alloc == cpu_tot:
+        avail_mem = 0
+    if alloc_mem == total_mem:
+        cpu_avail = 0
+
+    return percent_used_cpu, cpu_avail, percent_used_mem, avail_mem
+
+# This function turns a NodeRow into display cells, converting memory to human-readable units and adding color
+def format_node_row(row):
+    return (
+        row.node,
+        row.cpu_alloc,
+        row.cpu_avail,
+        row.cpu_tot,
+        format_percentage(row.cpu_usage),
+        f"{row.cpu_load:.2f}",
+        human_readable(row.alloc_mem),
+        human_readable(row.avail_mem),
+        human_readable(row.total_mem),
+        format_percentage(row.mem_usage),
+        colorize_node_state(row.state)
+    )
+
+# This function gathers one node's resources into a NodeRow, including its usage percents and available resources
+def build_node_row(node):
+    # Look up the fields we need, defaulting to 0 when scontrol reports something like N/A
+    cpu_alloc = parse_int(node.get("CPUAlloc", "0"))
+    cpu_tot = parse_int(node.get("CPUTot", "0"))
+    total_mem = parse_int(node.get("RealMemory", "0"))
+    alloc_mem = parse_int(node.get("AllocMem", "0"))
+
+    percent_used_cpu, cpu_avail, percent_used_mem, avail_mem = calculate_node_usage(cpu_alloc, cpu_tot, alloc_mem, total_mem)
+
+    return NodeRow(
+        node.get("NodeName", ""),
+        cpu_alloc,
+        cpu_avail,
+        cpu_tot,
+        percent_used_cpu,
+        parse_float(node.get("CPULoad", "0")),
+        alloc_mem,
+        avail_mem,
+        total_mem,
+        percent_used_mem,
+        node.get("State", "")
+    )
+
+# This function calculates the cluster totals, averages, and usage percents from the node rows
+def build_cluster_totals(rows):
+    # Sums each resource over the node rows
+    nodes = len(rows)
+    cpu_alloc = sum(row.cpu_alloc for row in rows)
+    cpu_tot = sum(row.cpu_tot for row in rows)
+    alloc_mem = sum(row.alloc_mem for row in rows)
+    total_mem = sum(row.total_mem for row in rows)
+
+    # Calculates the overall percents used, and the average cpu load
+    percent_used_cpu = cpu_alloc / cpu_tot * 100 if cpu_tot > 0 else 0
+    percent_used_mem = alloc_mem / total_mem * 100 if total_mem > 0 else 0
+    average_cpu_load = sum(row.cpu_load for row in rows) / nodes if nodes > 0 else 0
+
+    return ClusterTotals(
+        nodes,
+        cpu_alloc,
+        sum(row.cpu_avail for row in rows),
+        cpu_tot,
+        percent_used_cpu,
+        average_cpu_load,
+        alloc_mem,
+        sum(row.avail_mem for row in rows),
+        total_mem,
+        percent_used_mem
+    )
+
+# This function turns ClusterTotals into display cells, converting memory to human-readable units and adding color
+def format_totals_row(totals):
+    return (
+        totals.nodes,
+        totals.cpu_alloc,
+        totals.cpu_avail,
+        totals.cpu_tot,
+        format_percentage(totals.cpu_usage),
+        f"{totals.cpu_load:.2f}",
+        human_readable(totals.alloc_mem),
+        human_readable(totals.avail_mem),
+        human_readable(totals.total_mem),
+        format_percentage(totals.mem_usage)
+    )
 
 # This function will parse through node data to get available, allocated, and total resources
 # It will also calculate some resource averages and usage percents, as well as print output
 def parse_node_data(node_data_list):
-    # Initializes variables to track resource values
-    rows = []
-    overall_node = 0
-    overall_alloc_cpu = 0
-    overall_available_cpu = 0
-    overall_total_cpu = 0
-    overall_cpu_load = 0
-
-    overall_alloc_mem = 0
-    overall_available_mem = 0
-    overall_total_mem = 0
-
-    # Loop through each node and gather scontrol info on them
-    # This will also get resources and calculate resource totals and averages
-    for node in node_data_list:
-        overall_node += 1
-
-        # Initialize variables for each node to ensure numeric types
-        node_name = ""
-        cpu_alloc = 0
-        cpu_tot = 0
-        cpu_load = 0.0
-        total_mem = 0
-        alloc_mem = 0
-        node_state = ""
-        for line in node:
-            key = re.split(r"([A-Z]\w+)(?==)", line)[1]
-            value = re.split(r"([A-Z]\w+=)", line)[2]
-
-            # Changes values based on key
-            if key == "NodeName":
-                node_name = value           
-            elif key == "CPUAlloc":
-                try:
-                    cpu_alloc = int(value)
-                except ValueError:
-                    cpu_alloc = 0
-                overall_alloc_cpu += cpu_alloc
-            elif key == "CPUTot":
-                try:
-                    cpu_tot = int(value)
-                except ValueError:
-                    cpu_tot = 0
-                overall_total_cpu += cpu_tot
-            elif key == "CPULoad":
-                try:
-                    cpu_load = float(value)
-                except ValueError:
-                    cpu_load = 0.0
-                overall_cpu_load += cpu_load
-            elif key == "RealMemory":
-                try:
-                    total_mem = int(value)
-                except ValueError:
-                    total_mem = 0
-                overall_total_mem += total_mem
-            elif key == "AllocMem":
-                try:
-                    alloc_mem = int(value)
-                except ValueError:
-                    alloc_mem = 0
-                overall_alloc_mem += alloc_mem
-            elif key == "State":
-                node_state = value
-
-        # Calculates percent used for cpu
-        percent_used_cpu = 0.0
-        if cpu_tot > 0:
-            percent_used_cpu = cpu_alloc / cpu_tot * 100.0
-
-        # Calculates available cpus
-        cpu_avail = cpu_tot
-        if cpu_alloc != 0:
-            cpu_avail = cpu_tot - cpu_alloc
-
-        # Calculates percent used for memory
-        percent_used_mem = 0.0
-        if total_mem > 0:
-            percent_used_mem = alloc_mem / total_mem * 100.0
-
-        # Calculates available memory
-        avail_mem = total_mem
-        if alloc_mem != 0:
-            avail_mem = total_mem - alloc_mem
-
-        # Adjust available resources based on full allocated resources
-        if cpu_alloc == cpu_tot:
-            avail_mem = 0
-        if alloc_mem == total_mem:
-            cpu_avail = 0
-
-        # Calculate the available resources
-        overall_available_cpu += cpu_avail
-        overall_available_mem += avail_mem
-
-        # Save original numeric values for calculations, convert to human-readable for display
-        alloc_mem_hr = human_readable(alloc_mem)
-        total_mem_hr = human_readable(total_mem)
-        avail_mem_hr = human_readable(avail_mem)
-
-        # Prepare formatted values for readability
-        formatted_cpu_usage = format_percentage(percent_used_cpu)
-        formatted_mem_usage = format_percentage(percent_used_mem)
-        formatted_cpu_load = f"{cpu_load:.2f}"
-        formatted_node_state = colorize_node_state(node_state)
-
-        # Append row with formatted values
-        rows.append([
-            node_name,
-            cpu_alloc,
-            cpu_avail,
-            cpu_tot,
-            formatted_cpu_usage,
-            formatted_cpu_load,
-            alloc_mem_hr,
-            avail_mem_hr,
-            total_mem_hr,
-            formatted_mem_usage,
-            formatted_node_state
-        ])
-
-    # Calculates the overall percent used for cpu
-    overall_percent_used_cpu = 0
-    if overall_total_cpu > 0:
-        overall_percent_used_cpu = overall_alloc_cpu / overall_total_cpu * 100
-
-    # Calculates the average cpu load
-    if overall_node > 0:
-        overall_cpu_load = overall_cpu_load / overall_node
-
-    # Calculates the overall percent used for mem
-    overall_percent_used_mem = 0
-    if overall_total_mem > 0:
-        overall_percent_used_mem = overall_alloc_mem / overall_total_mem * 100
-
-    # Swaps the overall allocated memory, total memory, and available memory to a human readable format for the table
-    overall_alloc_mem = human_readable(overall_alloc_mem)
-    overall_total_mem = human_readable(overall_total_mem)
-    overall_available_mem = human_readable(overall_available_mem)
+    rows = [build_node_row(node) for node in node_data_list]
+    totals = build_cluster_totals(rows)
 
     # Prints a table with the node statistics
     print_section_header("SLURM NODE STATUS")
-    
-    headers = ['Node', 'AllocCPU', 'AvailCPU', 'TotalCPU', 'CPU Usage', 'CPULoad', 'AllocMem', 'AvailMem', 'TotalMem', 'Mem Usage', 'NodeState']
-    colored_headers = create_colored_headers(headers)
-    
-    print(tabulate(rows, headers=colored_headers, tablefmt="grid", floatfmt=".2f"))
 
-    print_section_header("CLUSTER TOTALS")
+    print_table([format_node_row(row) for row in rows], _NODE_COLORED_HEADERS, _NODE_COLALIGN)
 
     # Prints the overall statistics
-    totals_headers = ['Nodes', 'AllocCPU', 'AvailCPU', 'TotalCPU', 'CPU Usage', 'AvgLoad', 'AllocMem', 'AvailMem', 'TotalMem', 'Mem Usage']
-    colored_totals_headers = create_colored_headers(totals_headers)
-    
-    totals_row = [  
-        overall_node,  
-        overall_alloc_cpu,  
-        overall_available_cpu,  
-        overall_total_cpu,  
-        format_percentage(overall_percent_used_cpu),  
-        f"{overall_cpu_load:.2f}",  
-        overall_alloc_mem,  
-        overall_available_mem,  
-        overall_total_mem,  
-        format_percentage(overall_percent_used_mem)  
-    ]  
-    print(tabulate([totals_row], headers=colored_totals_headers, tablefmt="grid", floatfmt=".2f"))  
-    
+    print_section_header("CLUSTER TOTALS")
+
+    print_table([format_totals_row(totals)], _TOTALS_COLORED_HEADERS, _TOTALS_COLALIGN)
+
     # Add a footer with legend
     print(f"\n{Fore.CYAN}{Style.BRIGHT}Legend:{Style.RESET_ALL}")
     print(f"  0% usage - No color")
@@ -314,17 +541,44 @@ def main():
     # Parse command line arguments
     args = parse_args()
 
-    # Get node data via scontrol and reformat it for easier usability
-    scontrol_output = subprocess.check_output("$(/usr/bin/which scontrol) show nodes --oneliner", shell=True).decode()
-    node_data_list = reformat_scontrol_output(scontrol_output)
-
-    # If a partition is specified, filter out unwanted nodes from reformatted scontrol output
-    if args.partition:
-        node_data_list = filter_partition_node_data(args, node_data_list)
+    # Initialize colorama for cross-platform colored output
+    # This is done here rather than at import so --help and importing sstate leave sys.stdout alone
+    init(autoreset=True)
 
-    # Parse through the node data to get available, allocated, and total resources
-    # This will also calculate some resource averages and usage percents, as well as print output
-    parse_node_data(node_data_list)
+    # Get node data via scontrol and reformat it for easier usability
+    # The --oneliner output is streamed, so the filtering and parsing below run as scontrol's output is read
+    # scontrol/sinfo are exec'd directly (no shell), so report a missing binary or failed query without a traceback
+    # Repeated runs within the cache TTL reuse the last scontrol output instead of querying the controller again
+    cache_ttl = 0 if args.no_cache else args.cache_ttl
+    try:
+        if args.scontrol_json:
+            # json.loads decodes the UTF-8 bytes itself, so the output is never copied into a str first
+            scontrol_output = b"".join(iter_slurm_output(["scontrol", "show", "nodes", "--json"], "show-nodes-json", cache_ttl))
+            try:
+                node_data_list = reformat_scontrol_json(scontrol_output)
+            except (ValueError, TypeError, AttributeError):
+                # e.g. a data_parser plugin warning printed ahead of the JSON, or JSON that isn't shaped like node data
+                sys.exit("sstate: could not parse 'scontrol show nodes --json' output")
+        elif args.sinfo:
+            sinfo_output = iter_slurm_output(["sinfo", "--noheader", "--Node", "--Format", _SINFO_FORMAT], "sinfo-nodes", cache_ttl)
+            try:
+                node_data_list = reformat_sinfo_output(sinfo_output)
+            except ValueError as e:
+                sys.exit(f"sstate: {e}")
+        else:
+            node_data_list = iter_scontrol_nodes(cache_ttl)
+
+        # If a partition is specified, filter out unwanted nodes from reformatted scontrol output
+        if args.partition:
+            node_data_list = filter_partition_node_data(node_data_list, args.partition.lower(), args.partition == "debug")
+
+        # Parse through the node data to get available, allocated, and total resources
+        # This will also calculate some resource averages and usage percents, as well as print output
+        parse_node_data(node_data_list)
+    except FileNotFoundError as e:
+        sys.exit(f"sstate: {e.filename} not found in PATH (are the Slurm client tools installed?)")
+    except subprocess.CalledProcessError as e:
+        sys.exit(f"sstate: '{' '.join(e.cmd)}' exited with status {e.returncode}")
 
 # Execute main function
 if __name__ == '__main__':